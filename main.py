@@ -3,43 +3,32 @@ Electrical Engineering Lab Grouping System
 ==========================================
 Course Rep Tool for STUBTECH EE Department
 - Student self-registration with validation
-- Auto-grouping: 2 groups (Mechatronics) & 3 groups (Renewable Energy)
+- Admin-run grouping: 2 groups (Mechatronics) & 3 groups (Renewable Energy);
+  new registrations wait for the next regroup
 - Admin dashboard with PDF + Excel export (with Marks column)
-- Full backup/restore system using JSON files
+- Full backup/restore system using JSON/Parquet data files
 - Streamlit Cloud ready (no external database required)
 """
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
 import re
 import hashlib
-import random
-import shutil
+import importlib.util
 import zipfile
-import base64
+from collections import Counter
 from io import BytesIO
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
 # ─────────────────────────────────────────────
-# REPORTLAB IMPORTS – MOVED TO TOP LEVEL TO FIX DEPLOYMENT ISSUE
+# REPORTLAB – availability is checked at top level; the library itself is
+# imported inside export_pdf() so student-only sessions never load it
 # ─────────────────────────────────────────────
-REPORTLAB_AVAILABLE = False
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import cm
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import (
-        SimpleDocTemplate, Table, TableStyle, Paragraph,
-        Spacer, HRFlowable,
-    )
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
 
 # ─────────────────────────────────────────────
 # PAGE CONFIG (must be first Streamlit call)
@@ -252,11 +241,13 @@ section[data-testid="stSidebar"] .stButton > button[kind="primary"] {
 _BASE = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(_BASE, "ee_data")
 BACKUP_DIR = os.path.join(_BASE, "ee_backups")
-STUDENTS_FILE = os.path.join(DATA_DIR, "students.json")
+STUDENTS_FILE = os.path.join(DATA_DIR, "students.parquet")
+LEGACY_STUDENTS_FILE = os.path.join(DATA_DIR, "students.json")  # migrated on startup
 MECH_FILE = os.path.join(DATA_DIR, "mech_groups.json")
 RENEW_FILE = os.path.join(DATA_DIR, "renew_groups.json")
 STATE_FILE = os.path.join(DATA_DIR, "app_state.json")
 LOG_FILE = os.path.join(DATA_DIR, "activity_log.json")
+DATA_EXTS = (".json", ".parquet")  # files included in backups
 
 ADMIN_USER = "admin"
 ADMIN_HASH = hashlib.sha256("eelab2024".encode()).hexdigest()
@@ -264,6 +255,22 @@ ADMIN_HASH = hashlib.sha256("eelab2024".encode()).hexdigest()
 # Minimum students required before grouping
 MIN_STUDENTS = 3
 
+# Lab names and their group labels. Group files store only
+# {index: group label}; full member rows are rebuilt from the student table.
+MECH_LAB = "Mechatronics Lab"
+RENEW_LAB = "Renewable Energy Systems Lab"
+MECH_GROUPS = ["Group A", "Group B"]
+RENEW_GROUPS = ["Group A", "Group B", "Group C"]
+
+# Columns of the student table (order used for display/export)
+STUDENT_COLUMNS = ["name", "index", "registered_at"]
+
+# Rows per page in the admin Student List
+PAGE_SIZE = 50
+
+# Rows shown per group in the Export & Reports previews
+PREVIEW_ROWS = 20
+
 # ─────────────────────────────────────────────
 # FILE / DATA UTILITIES
 # ─────────────────────────────────────────────
@@ -271,10 +278,12 @@ def init_storage():
     """Create directories and seed empty data files."""
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(BACKUP_DIR, exist_ok=True)
+    _migrate_legacy_students()
+    if not os.path.exists(STUDENTS_FILE):
+        _write_students([])
     defaults = {
-        STUDENTS_FILE: [],
-        MECH_FILE: {"Group A": [], "Group B": []},
-        RENEW_FILE: {"Group A": [], "Group B": [], "Group C": []},
+        MECH_FILE: {},
+        RENEW_FILE: {},
         STATE_FILE: {"last_backup": None, "last_grouping": None, "version": "1.0"},
         LOG_FILE: [],
     }
@@ -282,12 +291,12 @@ def init_storage():
         if not os.path.exists(path):
             _write(path, default)
 
-def _write(path: str, data) -> None:
-    """Atomic JSON write via temp file."""
+def _write_bytes(path: str, raw: bytes) -> None:
+    """Atomic write via temp file: one write() call, then os.replace."""
     tmp = path + ".tmp"
     try:
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(tmp, "wb") as f:
+            f.write(raw)
         os.replace(tmp, path)
     finally:
         if os.path.exists(tmp):
@@ -296,6 +305,50 @@ def _write(path: str, data) -> None:
             except OSError:
                 pass
 
+def _write(path: str, data) -> None:
+    """Atomic JSON write via temp file."""
+    # No indent: json only uses its C encoder when indent is None
+    _write_bytes(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+def _read_students_df() -> pd.DataFrame:
+    """Student table from Parquet (empty if the file is missing)."""
+    if os.path.exists(STUDENTS_FILE):
+        df = pd.read_parquet(STUDENTS_FILE)
+    else:
+        df = pd.DataFrame(columns=STUDENT_COLUMNS + ["name_lc"])
+    # Object columns even for an empty table or a missing column, so the
+    # .str accessors downstream never see all-NaN float64
+    return df.reindex(columns=STUDENT_COLUMNS + ["name_lc"]).astype(object)
+
+def _parse_legacy_students(raw: bytes) -> List[dict]:
+    """Records of a pre-Parquet students.json; ValueError unless it is a list."""
+    students = json.loads(raw)
+    if not isinstance(students, list):
+        raise ValueError("students.json does not hold a list of students")
+    return students
+
+def _migrate_legacy_students() -> None:
+    """Convert a pre-Parquet students.json into the Parquet table, once.
+
+    Raises ValueError (writing and removing nothing) if the file doesn't parse.
+    """
+    if os.path.exists(LEGACY_STUDENTS_FILE) and not os.path.exists(STUDENTS_FILE):
+        with open(LEGACY_STUDENTS_FILE, "rb") as f:
+            students = _parse_legacy_students(f.read())
+        _write_students(students)
+        # Once migrated, a leftover students.json would only go stale in backups
+        os.remove(LEGACY_STUDENTS_FILE)
+
+def _write_students(students: List[dict]) -> None:
+    """Atomically replace the student table (Parquet, zstd)."""
+    buf = BytesIO()
+    df = pd.DataFrame(students, columns=STUDENT_COLUMNS + ["name_lc"])
+    df.to_parquet(buf, index=False, compression="zstd")
+    _write_bytes(STUDENTS_FILE, buf.getvalue())
+
+def _students_stamp() -> Tuple[int, int]:
+    return _stamp(STUDENTS_FILE)
+
 def _read(path: str):
     """Read JSON file; return None on error."""
     try:
@@ -304,6 +357,103 @@ def _read(path: str):
     except (FileNotFoundError, json.JSONDecodeError):
         return None
 
+def _stamp(path: str) -> Tuple[int, int]:
+    """(mtime_ns, size) of a file, used as a cache key; (0, 0) if missing."""
+    try:
+        info = os.stat(path)
+        return info.st_mtime_ns, info.st_size
+    except OSError:
+        return 0, 0
+
+# Keyed on the file stamp, so a write is its own invalidation; only the
+# latest snapshot is kept.
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _students_df(stamp: Tuple[int, int]) -> pd.DataFrame:
+    df = _read_students_df()
+    # Records written before name_lc existed get it derived here, once
+    df["name_lc"] = df["name_lc"].fillna(df["name"].str.lower())
+    return df
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_all(stamps: Tuple[Tuple[int, int], ...]) -> Tuple[list, dict, dict, dict]:
+    students = get_students_df().to_dict("records")
+    by_index = {s["index"]: s for s in students}
+    return (
+        students,
+        _expand_groups(_as_assignment(_read(MECH_FILE) or {}), by_index, MECH_GROUPS, MECH_LAB),
+        _expand_groups(_as_assignment(_read(RENEW_FILE) or {}), by_index, RENEW_GROUPS, RENEW_LAB),
+        _read(STATE_FILE) or {},
+    )
+
+def load_all() -> Tuple[list, dict, dict, dict]:
+    """(students, mech, renew, state), parsed once per change to any of the files.
+
+    mech/renew are {group: [member, ...]} views joined from the stored
+    {index: group} assignments and the student records.
+
+    Shared between reruns and sessions — copy before mutating.
+    """
+    return _load_all(_data_stamps())
+
+def _data_stamps() -> Tuple[Tuple[int, int], ...]:
+    return (_students_stamp(),) + tuple(_stamp(p) for p in (MECH_FILE, RENEW_FILE, STATE_FILE))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _group_index(stamps: Tuple[Tuple[int, int], ...]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    _, mech, renew, _ = _load_all(stamps)
+    return (
+        {m["index"]: g for g, members in mech.items() for m in members},
+        {m["index"]: g for g, members in renew.items() for m in members},
+    )
+
+def lookup_groups(index: str) -> Tuple[Optional[str], Optional[str]]:
+    """(Mechatronics group, Renewable group) of a student; None where not placed."""
+    mech_of, renew_of = _group_index(_data_stamps())
+    return mech_of.get(index), renew_of.get(index)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _students_summary(stamp: Tuple[int, int]) -> Dict:
+    df = get_students_df()
+    last = df["registered_at"].iat[-1] if len(df) else None
+    return {"count": len(df), "last_registered": last if pd.notna(last) else None}
+
+def students_summary() -> Dict:
+    """{"count", "last_registered"} for the sidebar; reads only the student table."""
+    return _students_summary(_students_stamp())
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_logs(stamp: Tuple[int, int]) -> list:
+    return _read(LOG_FILE) or []
+
+def load_logs() -> list:
+    """Activity log entries, parsed once per change. Shared — don't mutate."""
+    return _load_logs(_stamp(LOG_FILE))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _log_view(stamp: Tuple[int, int]) -> Tuple[pd.DataFrame, Counter, Dict[str, str]]:
+    tail = _load_logs(stamp)[-500:]
+    # One pass over the tail: per-event counts and last-seen timestamps
+    counts = Counter(e["event"] for e in tail)
+    last_seen = {e["event"]: e["timestamp"] for e in tail}
+
+    df_log = pd.DataFrame(reversed(tail), columns=["event", "detail", "timestamp"])
+    df_log["timestamp"] = pd.to_datetime(df_log["timestamp"])
+    df_log["date"] = df_log["timestamp"].dt.strftime("%d %b %Y")
+    df_log["time"] = df_log["timestamp"].dt.strftime("%H:%M:%S")
+    return df_log, counts, last_seen
+
+def log_view() -> Tuple[pd.DataFrame, Counter, Dict[str, str]]:
+    """(newest-first frame of the last 500 events, per-event counts, last-seen
+    timestamps), built once per log change. Shared — don't mutate."""
+    return _log_view(_stamp(LOG_FILE))
+
+def get_students_df() -> pd.DataFrame:
+    """Student table as a DataFrame, rebuilt only when the student file changes.
+
+    The frame is shared between reruns and sessions — treat it as read-only.
+    """
+    return _students_df(_students_stamp())
+
 def log_event(event: str, detail: dict = None):
     """Append an event to the activity log (silent on failure)."""
     try:
@@ -322,10 +472,13 @@ def log_event(event: str, detail: dict = None):
 # ─────────────────────────────────────────────
 # VALIDATION
 # ─────────────────────────────────────────────
+_INDEX_RE = re.compile(r"^STUBTECH\d{6}$")
+_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z .'\-]{1,}$")
+
 def validate_index(raw: str) -> Tuple[bool, str]:
     """Returns (ok, cleaned_or_error)."""
     cleaned = raw.strip().upper()
-    if re.match(r"^STUBTECH\d{6}$", cleaned):
+    if _INDEX_RE.match(cleaned):
         return True, cleaned
     return False, "Index must be in the format STUBTECH followed by exactly 6 digits (e.g. STUBTECH220457)"
 
@@ -333,55 +486,62 @@ def validate_name(raw: str) -> Tuple[bool, str]:
     cleaned = " ".join(raw.strip().split())
     if len(cleaned) < 2:
         return False, "Name is too short"
-    if not re.match(r"^[A-Za-z][A-Za-z .'\-]{1,}$", cleaned):
+    if not _NAME_RE.match(cleaned):
         return False, "Name should contain only letters, spaces, hyphens, or apostrophes"
     return True, cleaned
 
 def check_duplicate(index: str, name: str) -> Tuple[bool, str]:
-    students = _read(STUDENTS_FILE) or []
-    idx_set = {s["index"] for s in students}
-    name_set = {s["name"].lower() for s in students}
-    if index in idx_set:
+    students = get_students_df()
+    if (students["index"] == index).any():
         return True, f"Index **{index}** is already registered."
-    if name.lower() in name_set:
+    if (students["name_lc"] == name.lower()).any():
         return True, f"A student named **{name}** is already registered."
     return False, ""
 
 # ─────────────────────────────────────────────
 # GROUPING ENGINE
 # ─────────────────────────────────────────────
-def _build_mech_groups(students: List[dict]) -> Dict[str, list]:
-    pool = random.sample(students, len(students))
-    half = len(pool) // 2
-    rem = len(pool) % 2
-    def entry(s, letter):
-        return {**s, "group": f"Group {letter}", "lab": "Mechatronics Lab", "marks": ""}
-    return {
-        "Group A": [entry(s, "A") for s in pool[:half + rem]],
-        "Group B": [entry(s, "B") for s in pool[half + rem:]],
-    }
-
-def _build_renew_groups(students: List[dict]) -> Dict[str, list]:
-    pool = random.sample(students, len(students))
-    n = len(pool)
-    base = n // 3
-    extra = n % 3  # 0, 1, or 2
-    sizes = [base + (1 if i < extra else 0) for i in range(3)]
-    def entry(s, letter):
-        return {**s, "group": f"Group {letter}", "lab": "Renewable Energy Systems Lab", "marks": ""}
-    idx = 0
-    groups = {}
-    for letter, size in zip(["A", "B", "C"], sizes):
-        groups[f"Group {letter}"] = [entry(s, letter) for s in pool[idx:idx + size]]
-        idx += size
+def _shuffled_indices(df: pd.DataFrame) -> np.ndarray:
+    """Index numbers of df in random order (one numpy permutation)."""
+    perm = np.random.default_rng().permutation(len(df))
+    return df["index"].to_numpy()[perm]
+
+def _split_groups(df: pd.DataFrame, group_names: List[str]) -> Dict[str, str]:
+    """Shuffle df and deal it into near-equal groups; earlier groups take
+    the remainder. Returns {index: group}."""
+    assignment = {}
+    for g, part in zip(group_names, np.array_split(_shuffled_indices(df), len(group_names))):
+        assignment.update(dict.fromkeys(part.tolist(), g))
+    return assignment
+
+def _as_assignment(raw: dict) -> Dict[str, str]:
+    """{index: group} from a group file; older files (and backups) stored
+    {group: [student, ...]}."""
+    if any(isinstance(v, list) for v in raw.values()):
+        return {m["index"]: g for g, members in raw.items() for m in members}
+    return raw
+
+def _expand_groups(assignment: Dict[str, str], by_index: Dict[str, dict],
+                   group_names: List[str], lab: str) -> Dict[str, list]:
+    """Join an {index: group} assignment with the student records."""
+    groups = {g: [] for g in group_names}
+    for index, g in assignment.items():
+        s = by_index.get(index)
+        if s is not None:  # removed since the last grouping
+            groups.setdefault(g, []).append({**s, "group": g, "lab": lab, "marks": ""})
     return groups
 
+def count_pending(students: List[dict], mech: Dict[str, list]) -> int:
+    """Registered students not yet placed in a group (waiting for a regroup)."""
+    grouped = {m["index"] for members in mech.values() for m in members}
+    return sum(1 for s in students if s["index"] not in grouped)
+
 def run_grouping() -> Tuple[bool, str]:
-    students = _read(STUDENTS_FILE) or []
+    students = get_students_df()
     if len(students) < MIN_STUDENTS:
         return False, f"Need at least {MIN_STUDENTS} students to form groups (currently {len(students)})."
-    _write(MECH_FILE, _build_mech_groups(students))
-    _write(RENEW_FILE, _build_renew_groups(students))
+    _write(MECH_FILE, _split_groups(students, MECH_GROUPS))
+    _write(RENEW_FILE, _split_groups(students, RENEW_GROUPS))
     state = _read(STATE_FILE) or {}
     state["last_grouping"] = datetime.now().strftime("%d %b %Y, %H:%M")
     _write(STATE_FILE, state)
@@ -391,26 +551,31 @@ def run_grouping() -> Tuple[bool, str]:
 # ─────────────────────────────────────────────
 # BACKUP SYSTEM
 # ─────────────────────────────────────────────
-def create_backup() -> Tuple[str, bytes]:
-    """Returns (label, zip_bytes)."""
+def create_backup() -> Tuple[str, str]:
+    """Returns (label, zip_path)."""
     label = datetime.now().strftime("backup_%Y%m%d_%H%M%S")
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+    zip_path = os.path.join(BACKUP_DIR, label + ".zip")
+    # Compress straight into the backup file (no in-memory copy), then
+    # rename so a half-written archive never shows up as a backup
+    tmp = zip_path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
         for fname in os.listdir(DATA_DIR):
-            if fname.endswith(".json"):
+            if fname.endswith(DATA_EXTS):
                 zf.write(os.path.join(DATA_DIR, fname), fname)
-    raw = buf.getvalue()
-    # Persist to disk as well
-    zip_path = os.path.join(BACKUP_DIR, label + ".zip")
-    with open(zip_path, "wb") as f:
-        f.write(raw)
+    os.replace(tmp, zip_path)
     state = _read(STATE_FILE) or {}
     state["last_backup"] = datetime.now().strftime("%d %b %Y, %H:%M")
     _write(STATE_FILE, state)
     log_event("backup_created", {"label": label})
-    return label, raw
+    return label, zip_path
 
 def list_backups() -> List[Dict]:
+    """Backups on the server, newest first; rescanned only when the backup
+    directory changes. Shared — don't mutate."""
+    return _list_backups(_stamp(BACKUP_DIR))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _list_backups(stamp: Tuple[int, int]) -> List[Dict]:
     if not os.path.exists(BACKUP_DIR):
         return []
     items = []
@@ -430,13 +595,21 @@ def restore_backup(zip_bytes: bytes) -> Tuple[bool, str]:
     try:
         with zipfile.ZipFile(BytesIO(zip_bytes)) as zf:
             names = zf.namelist()
-            if not any(n.endswith(".json") for n in names):
-                return False, "No JSON files found in the uploaded backup."
+            if not any(n.endswith(DATA_EXTS) for n in names):
+                return False, "No data files found in the uploaded backup."
+            # Pre-Parquet backup: its students.json replaces the current table,
+            # so check it parses before anything is overwritten
+            student_files = {os.path.basename(STUDENTS_FILE), os.path.basename(LEGACY_STUDENTS_FILE)}
+            legacy = (student_files & set(names)) == {os.path.basename(LEGACY_STUDENTS_FILE)}
+            if legacy:
+                _parse_legacy_students(zf.read(os.path.basename(LEGACY_STUDENTS_FILE)))
             for name in names:
-                if name.endswith(".json"):
-                    dest = os.path.join(DATA_DIR, name)
-                    with zf.open(name) as src, open(dest, "wb") as dst:
-                        dst.write(src.read())
+                if name.endswith(DATA_EXTS):
+                    _write_bytes(os.path.join(DATA_DIR, name), zf.read(name))
+            if legacy:
+                if os.path.exists(STUDENTS_FILE):
+                    os.remove(STUDENTS_FILE)
+                _migrate_legacy_students()
         log_event("backup_restored", {"files": names})
         return True, f"Restored {len(names)} files successfully."
     except Exception as e:
@@ -446,36 +619,43 @@ def restore_backup(zip_bytes: bytes) -> Tuple[bool, str]:
 # EXPORT: EXCEL
 # ─────────────────────────────────────────────
 def _df_from_groups(groups: Dict[str, list]) -> pd.DataFrame:
-    rows = []
-    for members in groups.values():
-        for m in members:
-            rows.append({
-                "Index Number": m.get("index", ""),
-                "Full Name": m.get("name", ""),
-                "Group": m.get("group", ""),
-                "Lab": m.get("lab", ""),
-                "Marks": m.get("marks", ""),
-            })
-    return pd.DataFrame(rows)
+    members = [m for ms in groups.values() for m in ms]
+    return pd.DataFrame({
+        "Index Number": [m.get("index", "") for m in members],
+        "Full Name": [m.get("name", "") for m in members],
+        "Group": [m.get("group", "") for m in members],
+        "Lab": [m.get("lab", "") for m in members],
+        "Marks": [m.get("marks", "") for m in members],
+    })
+
+def _members_df(members: list) -> pd.DataFrame:
+    """No. / Index Number / Full Name / Marks table for one group."""
+    return pd.DataFrame({
+        "No.": np.arange(1, len(members) + 1),
+        "Index Number": [m["index"] for m in members],
+        "Full Name": [m["name"] for m in members],
+        "Marks": [m.get("marks", "") for m in members],
+    })
+
+def _fit_columns(ws, df: pd.DataFrame, cap: int) -> None:
+    """Size sheet columns to their widest header/value, measured on the
+    DataFrame column-wise instead of walking every worksheet cell."""
+    from openpyxl.utils import get_column_letter
+    for i, name in enumerate(df.columns, 1):
+        widest = len(str(name))
+        if len(df):
+            widest = max(widest, int(df[name].astype(str).str.len().max()))
+        ws.column_dimensions[get_column_letter(i)].width = min(widest + 4, cap)
 
 def export_excel_single(groups: Dict[str, list], lab_name: str) -> bytes:
     """One sheet per group, with a Marks column."""
     buf = BytesIO()
     with pd.ExcelWriter(buf, engine="openpyxl") as writer:
         for group_name, members in groups.items():
-            df = pd.DataFrame([{
-                "No.": i + 1,
-                "Index Number": m["index"],
-                "Full Name": m["name"],
-                "Marks": m.get("marks", ""),
-            } for i, m in enumerate(members)])
+            df = _members_df(members)
             safe_sheet = f"{group_name}"
             df.to_excel(writer, sheet_name=safe_sheet, index=False)
-            ws = writer.sheets[safe_sheet]
-            # Column widths
-            for col in ws.columns:
-                max_w = max((len(str(c.value or "")) for c in col), default=10)
-                ws.column_dimensions[col[0].column_letter].width = min(max_w + 4, 50)
+            _fit_columns(writer.sheets[safe_sheet], df, 50)
         # Summary sheet
         summary_df = _df_from_groups(groups)
         summary_df.to_excel(writer, sheet_name="All Groups", index=False)
@@ -487,48 +667,61 @@ def export_excel_all(mech: Dict, renew: Dict) -> bytes:
     with pd.ExcelWriter(buf, engine="openpyxl") as writer:
         # Mechatronics sheets
         for group_name, members in mech.items():
-            df = pd.DataFrame([{
-                "No.": i + 1,
-                "Index Number": m["index"],
-                "Full Name": m["name"],
-                "Marks": m.get("marks", ""),
-            } for i, m in enumerate(members)])
+            df = _members_df(members)
             sheet = f"Mech {group_name}"
             df.to_excel(writer, sheet_name=sheet, index=False)
-            ws = writer.sheets[sheet]
-            for col in ws.columns:
-                w = max((len(str(c.value or "")) for c in col), default=10)
-                ws.column_dimensions[col[0].column_letter].width = min(w + 4, 45)
+            _fit_columns(writer.sheets[sheet], df, 45)
         # Renewable sheets
         for group_name, members in renew.items():
-            df = pd.DataFrame([{
-                "No.": i + 1,
-                "Index Number": m["index"],
-                "Full Name": m["name"],
-                "Marks": m.get("marks", ""),
-            } for i, m in enumerate(members)])
+            df = _members_df(members)
             sheet = f"Renew {group_name}"
             df.to_excel(writer, sheet_name=sheet, index=False)
-            ws = writer.sheets[sheet]
-            for col in ws.columns:
-                w = max((len(str(c.value or "")) for c in col), default=10)
-                ws.column_dimensions[col[0].column_letter].width = min(w + 4, 45)
-        # Master summary
-        all_df = pd.concat([_df_from_groups(mech), _df_from_groups(renew)], ignore_index=True)
-        all_df.to_excel(writer, sheet_name="Master List", index=False)
+            _fit_columns(writer.sheets[sheet], df, 45)
+        # Master summary: both labs written one after the other into the
+        # same sheet, so no concatenated copy is held in memory
+        mech_df = _df_from_groups(mech)
+        mech_df.to_excel(writer, sheet_name="Master List", index=False)
+        _df_from_groups(renew).to_excel(writer, sheet_name="Master List", index=False,
+                                        header=False, startrow=len(mech_df) + 1)
     return buf.getvalue()
 
+# Download buttons re-send their payload on every rerun; keep the built
+# workbooks per data stamp so a rerun only re-serves the same bytes.
+@st.cache_resource(show_spinner=False, max_entries=3)
+def _excel_export(stamps: Tuple[Tuple[int, int], ...], which: str) -> bytes:
+    _, mech, renew, _ = _load_all(stamps)
+    if which == "mech":
+        return export_excel_single(mech, MECH_LAB)
+    if which == "renew":
+        return export_excel_single(renew, RENEW_LAB)
+    return export_excel_all(mech, renew)
+
+def excel_export(which: str) -> bytes:
+    """Workbook for "mech", "renew" or "all", rebuilt only when the data changes."""
+    return _excel_export(_data_stamps(), which)
+
 # ─────────────────────────────────────────────
 # EXPORT: PDF
 # ─────────────────────────────────────────────
-def export_pdf(groups: Dict[str, list], lab_title: str) -> bytes:
+def export_pdf(groups: Dict[str, list], lab_title: str, generated: Optional[str] = None) -> bytes:
     """
     Generate a formatted, printable PDF for one lab's groups.
+    `generated` is the header timestamp; defaults to now.
     """
     if not REPORTLAB_AVAILABLE:
         st.error("PDF generation is not available — reportlab library is missing.")
         return b""
 
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import (
+        SimpleDocTemplate, Table, TableStyle, Paragraph,
+        Spacer, HRFlowable,
+    )
+    from reportlab.lib.enums import TA_CENTER
+
     buf = BytesIO()
     doc = SimpleDocTemplate(
         buf, pagesize=A4,
@@ -567,7 +760,7 @@ def export_pdf(groups: Dict[str, list], lab_title: str) -> bytes:
     story.append(Paragraph("STUBTECH — Electrical Engineering Department", sub_style))
     story.append(Paragraph(lab_title, title_style))
     story.append(Paragraph(
-        f"Lab Groupings · Generated: {datetime.now().strftime('%d %B %Y, %H:%M')}",
+        f"Lab Groupings · Generated: {generated or datetime.now().strftime('%d %B %Y, %H:%M')}",
         sub_style,
     ))
     story.append(HRFlowable(width="100%", thickness=2, color=SKY, spaceAfter=12))
@@ -640,6 +833,19 @@ def export_pdf(groups: Dict[str, list], lab_title: str) -> bytes:
     doc.build(story)
     return buf.getvalue()
 
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _pdf_export(stamps: Tuple[Tuple[int, int], ...], which: str, generated: str) -> bytes:
+    _, mech, renew, _ = _load_all(stamps)
+    if which == "mech":
+        return export_pdf(mech, MECH_LAB, generated)
+    return export_pdf(renew, RENEW_LAB, generated)
+
+def pdf_export(which: str) -> bytes:
+    """PDF for "mech" or "renew", laid out again only when the data or the
+    printed (minute-resolution) generation time changes."""
+    generated = datetime.now().strftime('%d %B %Y, %H:%M')
+    return _pdf_export(_data_stamps(), which, generated)
+
 # ─────────────────────────────────────────────
 # AUTHENTICATION
 # ─────────────────────────────────────────────
@@ -705,26 +911,32 @@ def student_page():
                 if is_dup:
                     st.error(f"❌ {dup_msg}")
                 else:
-                    students = _read(STUDENTS_FILE) or []
+                    students = get_students_df().to_dict("records")
                     students.append({
                         "name": name_result,
+                        "name_lc": name_result.lower(),
                         "index": idx_result,
                         "registered_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     })
-                    _write(STUDENTS_FILE, students)
-                    # Auto-regroup whenever a new student joins
-                    if len(students) >= MIN_STUDENTS:
-                        run_grouping()
+                    _write_students(students)
+                    # Grouping is batched: new students wait for the next
+                    # regroup from the admin dashboard instead of reshuffling
+                    # everyone on every registration.
                     log_event("student_registered", {"index": idx_result, "total": len(students)})
-                    st.success(f"🎉 Welcome, **{name_result}**! You've been registered successfully.")
-                    st.balloons()
+                    # Shown after the rerun below, which would otherwise discard it
+                    st.session_state["registration_notice"] = (
+                        f"🎉 Welcome, **{name_result}**! You've been registered successfully. "
+                        "Your lab groups will appear once the course rep updates the groupings."
+                    )
                     st.rerun()
 
+        notice = st.session_state.pop("registration_notice", None)
+        if notice:
+            st.success(notice)
+            st.balloons()
+
     with col_info:
-        students = _read(STUDENTS_FILE) or []
-        mech = _read(MECH_FILE) or {}
-        renew = _read(RENEW_FILE) or {}
-        state = _read(STATE_FILE) or {}
+        students, mech, renew, state = load_all()
 
         # Stats
         st.markdown('<div class="ee-card">', unsafe_allow_html=True)
@@ -756,8 +968,7 @@ def student_page():
             if lookup:
                 ok, clean = validate_index(lookup)
                 if ok:
-                    found_mech = next((m["group"] for g in mech.values() for m in g if m["index"] == clean), None)
-                    found_renew = next((m["group"] for g in renew.values() for m in g if m["index"] == clean), None)
+                    found_mech, found_renew = lookup_groups(clean)
                     if found_mech or found_renew:
                         if found_mech:
                             badge = "group-badge-a" if "A" in found_mech else "group-badge-b"
@@ -766,6 +977,9 @@ def student_page():
                             ltr = found_renew[-1]
                             badge = {"A": "group-badge-a", "B": "group-badge-b", "C": "group-badge-c"}.get(ltr, "group-badge-a")
                             st.markdown(f"🌱 **Renewable Energy Lab:** <span class='{badge}'>{found_renew}</span>", unsafe_allow_html=True)
+                    elif (get_students_df()["index"] == clean).any():
+                        st.info("You're registered, but not placed in a group yet. "
+                                "Your groups will appear after the course rep's next regroup.")
                     else:
                         st.info("Index not found in current groups.")
                 else:
@@ -783,12 +997,106 @@ def student_page():
 # ─────────────────────────────────────────────
 # ADMIN DASHBOARD
 # ─────────────────────────────────────────────
+# Student List sort options -> column of the student table (None = as registered)
+SORT_KEYS = {"Registration order": None, "Name": "name_lc", "Index Number": "index"}
+
+@st.cache_resource(show_spinner=False, max_entries=len(SORT_KEYS))
+def _sort_order(stamp: Tuple[int, int], key: str) -> np.ndarray:
+    """Row positions of the student table ordered by `key`, per file stamp."""
+    return np.argsort(get_students_df()[key].to_numpy(), kind="stable")
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _list_positions(stamp: Tuple[int, int], search: str, sort_key: Optional[str]) -> np.ndarray:
+    """Row positions of the Student List for a query and sort, per file stamp."""
+    students_df = get_students_df()
+    order = _sort_order(stamp, sort_key) if sort_key else np.arange(len(students_df))
+    if not search:
+        return order
+    # name_lc is stored lower-case and index upper-case, so a plain
+    # substring test (no regex, no per-row case folding) is enough
+    q = search.lower()
+    mask = (
+        students_df["name_lc"].str.contains(q, regex=False, na=False) |
+        students_df["index"].str.contains(q.upper(), regex=False, na=False)
+    )
+    return order[mask.to_numpy()[order]]
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _list_exports(stamp: Tuple[int, int], search: str, sort_key: Optional[str]) -> Tuple[bytes, bytes]:
+    """(CSV, XLSX) bytes of the filtered Student List, built once per query."""
+    df_students = _student_table(get_students_df(), _list_positions(stamp, search, sort_key))
+    csv_buf = BytesIO()
+    df_students.to_csv(csv_buf, encoding="utf-8")
+    xl_buf = BytesIO()
+    with pd.ExcelWriter(xl_buf, engine="openpyxl") as writer:
+        df_students.to_excel(writer, index=True)
+    return csv_buf.getvalue(), xl_buf.getvalue()
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _removal_options(stamp: Tuple[int, int]) -> Tuple[List[str], Dict[str, int]]:
+    """Remove-selectbox labels ("INDEX — Name") and label -> row position."""
+    df = get_students_df()
+    opts = (df["index"] + " — " + df["name"]).tolist()
+    return opts, {o: i for i, o in enumerate(opts)}
+
+def _student_table(df: pd.DataFrame, pos: np.ndarray) -> pd.DataFrame:
+    """Display/export view of the student rows at positions pos, numbered from 1."""
+    return (df[STUDENT_COLUMNS].iloc[pos]
+            .set_axis(["Full Name", "Index Number", "Registered At"], axis=1)
+            .set_axis(pos + 1, axis=0))
+
+@st.fragment
+def _student_list_fragment():
+    """Search / sort / page / export block of the Student List. Runs as a
+    fragment so applying a search reruns only this block."""
+    students_df = get_students_df()
+    # In a form, so the filter runs once on Enter/Apply rather than per keystroke
+    with st.form("student_search", clear_on_submit=False, border=False):
+        c_search, c_sort, c_go = st.columns([3, 1, 0.6], vertical_alignment="bottom")
+        with c_search:
+            search = st.text_input("🔍 Search by name or index", placeholder="Type and press Enter…")
+        with c_sort:
+            sort_by = st.selectbox("Sort by", list(SORT_KEYS))
+        with c_go:
+            st.form_submit_button("Apply", use_container_width=True)
+    # Filtering and the exports are cached per (file stamp, query, sort), so
+    # flipping pages only slices an existing position array
+    stamp, sort_key = _students_stamp(), SORT_KEYS[sort_by]
+    pos = _list_positions(stamp, search, sort_key)
+
+    # Only the visible page is turned into a display frame
+    n_pages = max(1, -(-len(pos) // PAGE_SIZE))
+    if n_pages > 1:
+        st.session_state["student_list_page"] = min(st.session_state.get("student_list_page", 1), n_pages)
+        page = st.number_input("Page", min_value=1, max_value=n_pages, key="student_list_page")
+    else:
+        page = 1
+    page_pos = pos[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+
+    st.markdown(f"Showing **{len(pos)}** of **{len(students_df)}** students"
+                + (f" — page {page} of {n_pages}" if n_pages > 1 else ""))
+    st.dataframe(_student_table(students_df, page_pos), use_container_width=True)
+
+    # Export student list
+    csv, xl = _list_exports(stamp, search, sort_key)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.download_button(
+            "📥 Download as CSV",
+            data=csv,
+            file_name=f"Students_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+        )
+    with c2:
+        st.download_button(
+            "📊 Download as Excel",
+            data=xl,
+            file_name=f"Students_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
 def admin_page():
-    students = _read(STUDENTS_FILE) or []
-    mech = _read(MECH_FILE) or {}
-    renew = _read(RENEW_FILE) or {}
-    state = _read(STATE_FILE) or {}
-    logs = _read(LOG_FILE) or []
+    students, mech, renew, state = load_all()
 
     # ── Sidebar admin nav ──
     st.sidebar.markdown("---")
@@ -845,9 +1153,15 @@ def admin_page():
 
         st.markdown("<hr class='ee-divider'>", unsafe_allow_html=True)
         st.markdown("#### ⚡ Quick Actions")
+        pending = count_pending(students, mech)
+        if pending:
+            st.markdown(f'<div class="info-strip">🕐 <strong>{pending}</strong> newly registered '
+                        f'student(s) are not in a group yet — re-generate groups to include them.</div>',
+                        unsafe_allow_html=True)
         qa1, qa2, qa3 = st.columns(3)
         with qa1:
-            if st.button("🔄 Re-generate Groups", use_container_width=True, type="primary"):
+            regen_label = f"🔄 Re-generate Groups ({pending} pending)" if pending else "🔄 Re-generate Groups"
+            if st.button(regen_label, use_container_width=True, type="primary"):
                 ok, msg = run_grouping()
                 if ok:
                     st.success(msg)
@@ -856,18 +1170,19 @@ def admin_page():
                     st.warning(msg)
         with qa2:
             if st.button("💾 Create Backup Now", use_container_width=True):
-                label, raw = create_backup()
+                label, zip_path = create_backup()
                 st.success(f"Backup **{label}** created!")
-                st.download_button(
-                    "📥 Download Backup",
-                    data=raw,
-                    file_name=f"{label}.zip",
-                    mime="application/zip",
-                    key="quick_backup_dl"
-                )
+                with open(zip_path, "rb") as f:
+                    st.download_button(
+                        "📥 Download Backup",
+                        data=f,
+                        file_name=f"{label}.zip",
+                        mime="application/zip",
+                        key="quick_backup_dl"
+                    )
         with qa3:
             if st.button("📤 Export All (Excel)", use_container_width=True):
-                xl = export_excel_all(mech, renew)
+                xl = excel_export("all")
                 st.download_button(
                     "📥 Download All Groups Excel",
                     data=xl,
@@ -883,9 +1198,12 @@ def admin_page():
             st.info("No students registered yet.")
             return
 
-        tab_mech, tab_renew = st.tabs(["🔧 Mechatronics Lab", "🌱 Renewable Energy Systems Lab"])
+        # A radio instead of st.tabs: tabs build every panel on each rerun,
+        # this renders only the lab being viewed.
+        lab_view = st.radio("Lab", ["🔧 Mechatronics Lab", "🌱 Renewable Energy Systems Lab"],
+                            horizontal=True, label_visibility="collapsed")
 
-        with tab_mech:
+        if lab_view == "🔧 Mechatronics Lab":
             st.markdown(f"**{sum(len(v) for v in mech.values())} students** across 2 groups")
             cols = st.columns(2)
             for i, (gname, members) in enumerate(mech.items()):
@@ -894,14 +1212,16 @@ def admin_page():
                     st.markdown(f"<span class='{badge}'>{gname}</span> &nbsp; ({len(members)} students)",
                                 unsafe_allow_html=True)
                     if members:
-                        df = pd.DataFrame([{
-                            "#": j+1, "Index": m["index"], "Name": m["name"]
-                        } for j, m in enumerate(members)])
+                        df = pd.DataFrame({
+                            "#": np.arange(1, len(members) + 1),
+                            "Index": [m["index"] for m in members],
+                            "Name": [m["name"] for m in members],
+                        })
                         st.dataframe(df, use_container_width=True, hide_index=True, height=300)
                     else:
                         st.info("Empty group")
 
-        with tab_renew:
+        else:
             st.markdown(f"**{sum(len(v) for v in renew.values())} students** across 3 groups")
             cols = st.columns(3)
             badge_map = {"A": "group-badge-a", "B": "group-badge-b", "C": "group-badge-c"}
@@ -912,15 +1232,19 @@ def admin_page():
                     st.markdown(f"<span class='{badge}'>{gname}</span> &nbsp; ({len(members)} students)",
                                 unsafe_allow_html=True)
                     if members:
-                        df = pd.DataFrame([{
-                            "#": j+1, "Index": m["index"], "Name": m["name"]
-                        } for j, m in enumerate(members)])
+                        df = pd.DataFrame({
+                            "#": np.arange(1, len(members) + 1),
+                            "Index": [m["index"] for m in members],
+                            "Name": [m["name"] for m in members],
+                        })
                         st.dataframe(df, use_container_width=True, hide_index=True, height=300)
                     else:
                         st.info("Empty group")
 
         st.markdown("<hr class='ee-divider'>", unsafe_allow_html=True)
-        if st.button("🔄 Re-generate All Groups", type="primary"):
+        pending = count_pending(students, mech)
+        regen_label = f"🔄 Re-generate All Groups ({pending} pending)" if pending else "🔄 Re-generate All Groups"
+        if st.button(regen_label, type="primary"):
             ok, msg = run_grouping()
             if ok:
                 st.success(msg)
@@ -938,11 +1262,11 @@ def admin_page():
             st.info("No students registered yet.")
             return
 
-        tab_mech_ex, tab_renew_ex, tab_all_ex = st.tabs([
-            "🔧 Mechatronics Lab", "🌱 Renewable Energy Lab", "📦 All Groups"
-        ])
+        # Only the selected panel builds its workbook/PDF and previews
+        export_view = st.radio("Export", ["🔧 Mechatronics Lab", "🌱 Renewable Energy Lab", "📦 All Groups"],
+                               horizontal=True, label_visibility="collapsed")
 
-        with tab_mech_ex:
+        if export_view == "🔧 Mechatronics Lab":
             st.markdown("### Mechatronics Lab Export")
             st.markdown(f"Groups: **A** ({len(mech.get('Group A',[]))} students), "
                         f"**B** ({len(mech.get('Group B',[]))} students)")
@@ -955,7 +1279,7 @@ def admin_page():
 
             c1, c2 = st.columns(2)
             with c1:
-                xl_mech = export_excel_single(mech, "Mechatronics Lab")
+                xl_mech = excel_export("mech")
                 st.download_button(
                     "📊 Download Excel (Mechatronics)",
                     data=xl_mech,
@@ -965,7 +1289,7 @@ def admin_page():
                 )
             with c2:
                 if REPORTLAB_AVAILABLE:
-                    pdf_mech = export_pdf(mech, "Mechatronics Lab")
+                    pdf_mech = pdf_export("mech")
                     st.download_button(
                         "📄 Download PDF (Mechatronics)",
                         data=pdf_mech,
@@ -982,13 +1306,11 @@ def admin_page():
                 badge = "group-badge-a" if "A" in gname else "group-badge-b"
                 st.markdown(f"<span class='{badge}'>{gname}</span>", unsafe_allow_html=True)
                 if members:
-                    df = pd.DataFrame([{
-                        "No.": i+1, "Index Number": m["index"],
-                        "Full Name": m["name"], "Marks": ""
-                    } for i, m in enumerate(members)])
-                    st.dataframe(df, use_container_width=True, hide_index=True)
+                    st.dataframe(_members_df(members[:PREVIEW_ROWS]), use_container_width=True, hide_index=True)
+                    if len(members) > PREVIEW_ROWS:
+                        st.caption(f"First {PREVIEW_ROWS} of {len(members)} — the downloads contain the full list.")
 
-        with tab_renew_ex:
+        elif export_view == "🌱 Renewable Energy Lab":
             st.markdown("### Renewable Energy Systems Lab Export")
             st.markdown(
                 f"Groups: **A** ({len(renew.get('Group A',[]))} students), "
@@ -1004,7 +1326,7 @@ def admin_page():
 
             c1, c2 = st.columns(2)
             with c1:
-                xl_renew = export_excel_single(renew, "Renewable Energy Systems Lab")
+                xl_renew = excel_export("renew")
                 st.download_button(
                     "📊 Download Excel (Renewable Energy)",
                     data=xl_renew,
@@ -1014,7 +1336,7 @@ def admin_page():
                 )
             with c2:
                 if REPORTLAB_AVAILABLE:
-                    pdf_renew = export_pdf(renew, "Renewable Energy Systems Lab")
+                    pdf_renew = pdf_export("renew")
                     st.download_button(
                         "📄 Download PDF (Renewable Energy)",
                         data=pdf_renew,
@@ -1032,15 +1354,13 @@ def admin_page():
                 badge = badge_map.get(gname[-1], "group-badge-a")
                 st.markdown(f"<span class='{badge}'>{gname}</span>", unsafe_allow_html=True)
                 if members:
-                    df = pd.DataFrame([{
-                        "No.": i+1, "Index Number": m["index"],
-                        "Full Name": m["name"], "Marks": ""
-                    } for i, m in enumerate(members)])
-                    st.dataframe(df, use_container_width=True, hide_index=True)
+                    st.dataframe(_members_df(members[:PREVIEW_ROWS]), use_container_width=True, hide_index=True)
+                    if len(members) > PREVIEW_ROWS:
+                        st.caption(f"First {PREVIEW_ROWS} of {len(members)} — the downloads contain the full list.")
 
-        with tab_all_ex:
+        else:
             st.markdown("### Complete Export — All Labs & Groups")
-            xl_all = export_excel_all(mech, renew)
+            xl_all = excel_export("all")
             st.download_button(
                 "📦 Download Combined Excel (All Groups)",
                 data=xl_all,
@@ -1062,19 +1382,20 @@ def admin_page():
         with tab_create:
             st.markdown("#### Create a New Backup")
             st.markdown("""
-            A backup is a `.zip` archive of all JSON data files.
+            A backup is a `.zip` archive of all data files.
             Download and keep a copy somewhere safe (e.g. Google Drive, email).
             """)
             if st.button("💾 Create & Download Backup Now", type="primary", use_container_width=True):
-                label, raw = create_backup()
+                label, zip_path = create_backup()
                 st.success(f"✅ Backup **{label}** created.")
-                st.download_button(
-                    "📥 Click to Download Backup",
-                    data=raw,
-                    file_name=f"{label}.zip",
-                    mime="application/zip",
-                    use_container_width=True,
-                )
+                with open(zip_path, "rb") as f:
+                    st.download_button(
+                        "📥 Click to Download Backup",
+                        data=f,
+                        file_name=f"{label}.zip",
+                        mime="application/zip",
+                        use_container_width=True,
+                    )
 
             st.markdown("<hr class='ee-divider'>", unsafe_allow_html=True)
             st.markdown("#### ⚠️ Danger Zone — Clear All Data")
@@ -1083,9 +1404,9 @@ def admin_page():
                 if st.button("🗑️ Delete All Students & Groups", type="secondary"):
                     # Auto-backup before clearing
                     create_backup()
-                    _write(STUDENTS_FILE, [])
-                    _write(MECH_FILE, {"Group A": [], "Group B": []})
-                    _write(RENEW_FILE, {"Group A": [], "Group B": [], "Group C": []})
+                    _write_students([])
+                    _write(MECH_FILE, {})
+                    _write(RENEW_FILE, {})
                     log_event("data_cleared", {})
                     st.success("All data cleared. An automatic backup was saved first.")
                     st.rerun()
@@ -1150,13 +1471,12 @@ def admin_page():
                 sel_dl = st.selectbox("Download a specific backup", [b["name"] for b in server_backups])
                 sel_path = next(b["path"] for b in server_backups if b["name"] == sel_dl)
                 with open(sel_path, "rb") as f:
-                    bk_data = f.read()
-                st.download_button(
-                    "📥 Download Selected Backup",
-                    data=bk_data,
-                    file_name=sel_dl,
-                    mime="application/zip",
-                )
+                    st.download_button(
+                        "📥 Download Selected Backup",
+                        data=f,
+                        file_name=sel_dl,
+                        mime="application/zip",
+                    )
             else:
                 st.info("No backups available yet. Create one above.")
 
@@ -1167,54 +1487,20 @@ def admin_page():
             st.info("No students registered yet.")
             return
 
-        df_students = pd.DataFrame(students)[["name", "index", "registered_at"]]
-        df_students.columns = ["Full Name", "Index Number", "Registered At"]
-        df_students.index = range(1, len(df_students) + 1)
-
-        search = st.text_input("🔍 Search by name or index", placeholder="Type to filter…")
-        if search:
-            mask = (
-                df_students["Full Name"].str.contains(search, case=False, na=False) |
-                df_students["Index Number"].str.contains(search, case=False, na=False)
-            )
-            df_students = df_students[mask]
-
-        st.markdown(f"Showing **{len(df_students)}** of **{len(students)}** students")
-        st.dataframe(df_students, use_container_width=True)
-
-        # Export student list
-        c1, c2 = st.columns(2)
-        with c1:
-            csv = df_students.to_csv().encode()
-            st.download_button(
-                "📥 Download as CSV",
-                data=csv,
-                file_name=f"Students_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-            )
-        with c2:
-            buf = BytesIO()
-            with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-                df_students.to_excel(writer, index=True)
-            xl = buf.getvalue()
-            st.download_button(
-                "📊 Download as Excel",
-                data=xl,
-                file_name=f"Students_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
+        _student_list_fragment()
 
         st.markdown("<hr class='ee-divider'>", unsafe_allow_html=True)
         st.markdown("#### 🗑️ Remove a Student")
-        opts = [f"{s['index']} — {s['name']}" for s in students]
+        opts, pos_by_opt = _removal_options(_students_stamp())
         to_del = st.selectbox("Select student to remove", opts)
         confirm_del = st.checkbox("Confirm deletion (cannot be undone)")
         if confirm_del:
             if st.button("Remove Student", type="secondary"):
-                idx_del = opts.index(to_del)
-                removed = students.pop(idx_del)
-                _write(STUDENTS_FILE, students)
-                if len(students) >= MIN_STUDENTS:
+                idx_del = pos_by_opt[to_del]
+                remaining = list(students)
+                removed = remaining.pop(idx_del)
+                _write_students(remaining)
+                if len(remaining) >= MIN_STUDENTS:
                     run_grouping()
                 log_event("student_removed", {"index": removed["index"]})
                 st.success(f"Removed **{removed['name']}** and re-generated groups.")
@@ -1225,17 +1511,15 @@ def admin_page():
         st.markdown('<div class="page-title">📋 Activity Log</div>', unsafe_allow_html=True)
         st.markdown('<div class="page-subtitle">System event history</div>', unsafe_allow_html=True)
 
+        logs = load_logs()
         if not logs:
             st.info("No activity recorded yet.")
             return
 
-        df_log = pd.DataFrame(reversed(logs[-500:]))
-        df_log["timestamp"] = pd.to_datetime(df_log["timestamp"])
-        df_log["date"] = df_log["timestamp"].dt.strftime("%d %b %Y")
-        df_log["time"] = df_log["timestamp"].dt.strftime("%H:%M:%S")
+        df_log, counts, last_seen = log_view()
 
         # Filter
-        event_types = sorted(df_log["event"].unique().tolist())
+        event_types = sorted(counts)
         sel_events = st.multiselect("Filter by event type", event_types, default=event_types)
         df_log = df_log[df_log["event"].isin(sel_events)]
 
@@ -1254,8 +1538,11 @@ def admin_page():
         # Summary counts
         st.markdown("<hr class='ee-divider'>", unsafe_allow_html=True)
         st.markdown("#### Event Summary")
-        summary = df_log["event"].value_counts().reset_index()
-        summary.columns = ["Event", "Count"]
+        summary = pd.DataFrame(
+            [(ev, n, last_seen[ev][:19].replace("T", " "))
+             for ev, n in counts.most_common() if ev in sel_events],
+            columns=["Event", "Count", "Last Seen"],
+        )
         st.dataframe(summary, use_container_width=True, hide_index=True)
 
 # ─────────────────────────────────────────────
@@ -1278,25 +1565,31 @@ def sidebar_ui() -> str:
 
         st.markdown("---")
 
-        page = "Student"
+        # Only rerun on an actual page change; re-clicking the current
+        # page's button would otherwise re-run the whole script for nothing
+        current = st.session_state.get("nav", "Student")
         if st.button("🎓 Student Portal", use_container_width=True,
-                     type="primary" if st.session_state.get("nav") == "Student" else "secondary"):
-            st.session_state["nav"] = "Student"
+                     type="primary" if current == "Student" else "secondary"):
             st.session_state["admin_auth"] = False
-            st.rerun()
+            if current != "Student":
+                st.session_state["nav"] = "Student"
+                st.rerun()
 
         if st.button("🔐 Admin Dashboard", use_container_width=True,
-                     type="primary" if st.session_state.get("nav") == "Admin" else "secondary"):
+                     type="primary" if current == "Admin" else "secondary") and current != "Admin":
             st.session_state["nav"] = "Admin"
             st.rerun()
 
         st.markdown("---")
 
         # Quick stats
-        students = _read(STUDENTS_FILE) or []
+        summary = students_summary()
+        last_reg = (f'<span style="font-size:0.72rem; color:#4a7a9b;">Last: {summary["last_registered"]}</span><br>'
+                    if summary["last_registered"] else "")
         st.markdown(f"""
         <div style="font-size:0.8rem; color:#7dd3fc; padding: 0 0.25rem;">
-            📌 <strong style="color:#f0f9ff">{len(students)}</strong> students registered<br>
+            📌 <strong style="color:#f0f9ff">{summary["count"]}</strong> students registered<br>
+            {last_reg}
             <span style="font-size:0.72rem; color:#4a7a9b;">
                 Index format: STUBTECH + 6 digits
             </span>
@@ -1316,7 +1609,12 @@ def sidebar_ui() -> str:
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────
 def main():
-    init_storage()
+    try:
+        init_storage()
+    except ValueError as e:
+        # An unreadable students.json is left in place for manual repair
+        st.error(f"Could not convert {LEGACY_STUDENTS_FILE} to Parquet: {e}")
+        st.stop()
     nav = sidebar_ui()
 
     if nav == "Admin":
@@ -1,18 +1,18 @@
 import streamlit as st
-import pandas as pd
-import json
+import orjson
 import os
 import hashlib
+import hmac
 import random
 import time
 from datetime import datetime
-import shutil
-import base64
-from io import BytesIO
-import plotly.express as px
+from concurrent.futures import ThreadPoolExecutor
 import re
 import zipfile
 
+# pandas, numpy, plotly and BytesIO are imported inside the admin/report
+# functions that use them, so the student registration page doesn't load them
+
 # ==================== CONFIGURATION ====================
 st.set_page_config(
     page_title="EE Lab Grouping System",
@@ -24,63 +24,167 @@ st.set_page_config(
 # ==================== CONSTANTS ====================
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD_HASH = hashlib.sha256("admin123".encode()).hexdigest()
+ADMIN_PASSWORD_HASH_BYTES = bytes.fromhex(ADMIN_PASSWORD_HASH)
 DATA_DIR = "data"
 BACKUP_DIR = "backups"
-STUDENTS_FILE = os.path.join(DATA_DIR, "students.json")
+BLOB_DIR = os.path.join(BACKUP_DIR, "blobs")
+STUDENTS_FILE = os.path.join(DATA_DIR, "students.ndjson")
+LEGACY_STUDENTS_FILE = os.path.join(DATA_DIR, "students.json")
 MECHTRONICS_GROUPS_FILE = os.path.join(DATA_DIR, "mechtronics_groups.json")
 RENEWABLE_GROUPS_FILE = os.path.join(DATA_DIR, "renewable_groups.json")
 APP_STATE_FILE = os.path.join(DATA_DIR, "app_state.json")
 
+# Group labels per lab. Group files hold flat records
+# [{'index', 'name', 'group'}, ...]
+MECH_GROUPS = ["Group A", "Group B"]
+RENEW_GROUPS = ["Group A", "Group B", "Group C"]
+
+# Data file types included in backups
+DATA_EXTS = ('.json', '.ndjson')
+
 # Pagination
 PAGE_SIZE = 50
 
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Index number format
+_INDEX_RE = re.compile(r'^STUBTECH\d{6}$')
+
 # ==================== INITIALIZATION ====================
 def init_directories():
     """Create necessary directories"""
-    for directory in [DATA_DIR, BACKUP_DIR]:
+    for directory in [DATA_DIR, BACKUP_DIR, BLOB_DIR]:
         if not os.path.exists(directory):
             os.makedirs(directory)
 
 def init_data_files():
     """Initialize JSON files"""
+    migrate_students()
+    
     files_config = {
-        STUDENTS_FILE: [],
-        MECHTRONICS_GROUPS_FILE: {"Group A": [], "Group B": []},
-        RENEWABLE_GROUPS_FILE: {"Group A": [], "Group B": [], "Group C": []},
+        MECHTRONICS_GROUPS_FILE: [],
+        RENEWABLE_GROUPS_FILE: [],
         APP_STATE_FILE: {"last_backup": None, "total_students": 0}
     }
     
     for file_path, default_data in files_config.items():
         if not os.path.exists(file_path):
-            with open(file_path, 'w') as f:
-                json.dump(default_data, f)
+            save_data(file_path, default_data)
+
+def parse_legacy_students(raw):
+    """Parse a legacy students.json body; ValueError unless it is a list"""
+    students = orjson.loads(raw)
+    if not isinstance(students, list):
+        raise ValueError("students.json does not hold a list of students")
+    return students
+
+def migrate_students():
+    """Convert a legacy students.json list to NDJSON, or seed an empty file"""
+    if os.path.exists(STUDENTS_FILE):
+        return
+    if not os.path.exists(LEGACY_STUDENTS_FILE):
+        save_students([])
+        return
+    # Only remove the legacy file once it has parsed and been converted
+    with open(LEGACY_STUDENTS_FILE, 'rb') as f:
+        students = parse_legacy_students(f.read())
+    save_students(students)
+    os.remove(LEGACY_STUDENTS_FILE)
 
 # ==================== DATA MANAGEMENT ====================
-def load_data(file_path):
-    """Load data from JSON"""
+def file_stamp(file_path):
+    """(mtime_ns, size) of a file, or (0, 0) if missing"""
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        info = os.stat(file_path)
+        return info.st_mtime_ns, info.st_size
+    except OSError:
+        return 0, 0
+
+# Keyed on the file stamp, so a save is its own invalidation
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_cached(file_path, stamp):
+    try:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     except:
         return None
 
+def load_data(file_path):
+    """Load data from JSON (parsed once per file change)"""
+    return _load_cached(file_path, file_stamp(file_path))
+
+def write_bytes(file_path, raw):
+    """Atomic write: temp file, then rename"""
+    tmp = file_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp, file_path)
+
 def save_data(file_path, data):
     """Save data to JSON"""
-    with open(file_path, 'w') as f:
-        json.dump(data, f)
+    write_bytes(file_path, orjson.dumps(data))
+
+# Students are stored one JSON object per line, so a registration is a
+# single appended line instead of a rewrite of the whole list
+@st.cache_data(show_spinner=False, max_entries=1)
+def _load_students(stamp):
+    students = []
+    try:
+        with open(STUDENTS_FILE, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    students.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # Torn line from an interrupted append; skip it
+                    continue
+    except FileNotFoundError:
+        pass
+    return students
+
+def load_students():
+    """Load all student records"""
+    return _load_students(file_stamp(STUDENTS_FILE))
+
+def save_students(students):
+    """Rewrite the student file (used for deletions)"""
+    write_bytes(STUDENTS_FILE, b''.join(orjson.dumps(s) + b'\n' for s in students))
+
+def append_student(student):
+    """Append one student record"""
+    with open(STUDENTS_FILE, 'a+b') as f:
+        # Start on a fresh line if a previous append was cut off
+        prefix = b''
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b'\n':
+                prefix = b'\n'
+        f.write(prefix + orjson.dumps(student) + b'\n')
+
+def _blob_path(digest):
+    return os.path.join(BLOB_DIR, f"{digest}.json")
+
+def _read_and_hash(file):
+    with open(os.path.join(DATA_DIR, file), 'rb') as f:
+        raw = f.read()
+    return file, raw, hashlib.sha256(raw).hexdigest()
 
 def create_backup():
     """Create a backup"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_dir = os.path.join(BACKUP_DIR, f"backup_{timestamp}")
-    os.makedirs(backup_dir, exist_ok=True)
-    
-    # Copy all JSON files
-    for file in os.listdir(DATA_DIR):
-        if file.endswith('.json'):
-            src = os.path.join(DATA_DIR, file)
-            dst = os.path.join(backup_dir, file)
-            shutil.copy2(src, dst)
+    files = [f for f in sorted(os.listdir(DATA_DIR)) if f.endswith(DATA_EXTS)]
+    
+    # Each distinct file body is stored once, as blobs/<sha256>.json;
+    # the backup itself is just a manifest of {file: digest}
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        hashed = list(pool.map(_read_and_hash, files))
+        # Keyed by digest, so files with identical contents are written once
+        new_blobs = {digest: raw for _, raw, digest in hashed if not os.path.exists(_blob_path(digest))}
+        list(pool.map(lambda item: write_bytes(_blob_path(item[0]), item[1]), new_blobs.items()))
+    manifest = {file: digest for file, _, digest in hashed}
+    save_data(os.path.join(BACKUP_DIR, f"backup_{timestamp}.json"), manifest)
     
     # Update app state
     app_state = load_data(APP_STATE_FILE) or {}
@@ -96,72 +200,170 @@ def list_backups():
     
     backups = []
     for item in os.listdir(BACKUP_DIR):
-        if os.path.isdir(os.path.join(BACKUP_DIR, item)) and item.startswith('backup_'):
+        path = os.path.join(BACKUP_DIR, item)
+        # Manifests (.json), zip archives and older per-backup directories
+        stem, ext = (item, '') if os.path.isdir(path) else os.path.splitext(item)
+        if stem.startswith('backup_') and ext in ('', '.json', '.zip'):
             backups.append({
                 'name': item,
-                'path': os.path.join(BACKUP_DIR, item),
-                'timestamp': item.replace('backup_', '')
+                'path': path,
+                'timestamp': stem[len('backup_'):]
             })
     return sorted(backups, key=lambda x: x['timestamp'], reverse=True)
 
+def restore_backup(backup):
+    """Restore data files from a backup"""
+    # Read everything first so a missing blob can't leave a partial restore
+    files = {}
+    if os.path.isdir(backup['path']):
+        for file in os.listdir(backup['path']):
+            if file.endswith(DATA_EXTS):
+                with open(os.path.join(backup['path'], file), 'rb') as f:
+                    files[file] = f.read()
+    elif backup['path'].endswith('.zip'):
+        with zipfile.ZipFile(backup['path']) as z:
+            files = {n: z.read(n) for n in z.namelist() if n.endswith(DATA_EXTS)}
+    else:
+        manifest = load_data(backup['path'])
+        if not isinstance(manifest, dict):
+            raise ValueError(f"unreadable backup manifest {backup['name']}")
+        for file, digest in manifest.items():
+            with open(_blob_path(digest), 'rb') as f:
+                files[file] = f.read()
+    
+    if not files:
+        raise ValueError(f"no data files in {backup['name']}")
+    
+    # Backups taken before the NDJSON switch carry students.json instead;
+    # check it parses before anything is overwritten
+    legacy = os.path.basename(LEGACY_STUDENTS_FILE) in files and os.path.basename(STUDENTS_FILE) not in files
+    if legacy:
+        parse_legacy_students(files[os.path.basename(LEGACY_STUDENTS_FILE)])
+    
+    for file, raw in files.items():
+        write_bytes(os.path.join(DATA_DIR, os.path.basename(file)), raw)
+    
+    if legacy:
+        if os.path.exists(STUDENTS_FILE):
+            os.remove(STUDENTS_FILE)
+        migrate_students()
+    return len(files)
+
 # ==================== VALIDATION ====================
 def validate_index(index):
     """Validate index number"""
-    pattern = r'^STUBTECH\d{6}$'
-    return re.match(pattern, index.upper()) is not None
+    return _INDEX_RE.match(index.upper()) is not None
 
 def validate_name(name):
     """Validate name"""
     return len(name.strip()) >= 2 and all(c.isalpha() or c.isspace() for c in name)
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _index_set(stamp):
+    return frozenset(s['index'] for s in load_students())
+
 def is_duplicate(index):
     """Check for duplicate index"""
-    students = load_data(STUDENTS_FILE) or []
-    return any(s['index'] == index.upper() for s in students)
+    return index.upper() in _index_set(file_stamp(STUDENTS_FILE))
 
 # ==================== GROUPING FUNCTIONS ====================
+def _group_stamps():
+    return file_stamp(MECHTRONICS_GROUPS_FILE), file_stamp(RENEWABLE_GROUPS_FILE)
+
+def group_records(members, groups):
+    """Round-robin members into flat {'index', 'name', 'group'} records"""
+    n = len(groups)
+    return [
+        {'index': m['index'], 'name': m['name'], 'group': group}
+        for k, group in enumerate(groups)
+        for m in members[k::n]
+    ]
+
+def _as_records(data):
+    # Files written before the flat format hold {group: [members]}
+    if isinstance(data, dict):
+        return [
+            {'index': m['index'], 'name': m['name'], 'group': group}
+            for group, members in data.items()
+            for m in members
+        ]
+    return data or []
+
+def group_sizes(records, groups):
+    """{group: member count}, including empty groups"""
+    sizes = dict.fromkeys(groups, 0)
+    for r in records:
+        sizes[r['group']] = sizes.get(r['group'], 0) + 1
+    return sizes
+
+def get_groups():
+    """(mechatronics, renewable) group records, kept in session until the files change"""
+    cached = st.session_state.get('groups')
+    stamps = _group_stamps()
+    if cached is None or cached[0] != stamps:
+        cached = (
+            stamps,
+            _as_records(load_data(MECHTRONICS_GROUPS_FILE)),
+            _as_records(load_data(RENEWABLE_GROUPS_FILE)),
+        )
+        st.session_state.groups = cached
+    return cached[1], cached[2]
+
+def save_groups(mech, renew):
+    """Save both group files and refresh the session copy"""
+    save_data(MECHTRONICS_GROUPS_FILE, mech)
+    save_data(RENEWABLE_GROUPS_FILE, renew)
+    st.session_state.groups = (_group_stamps(), mech, renew)
+
 def assign_groups(students):
     """Assign students to groups"""
     if len(students) < 6:
         return False
     
     # Shuffle students
-    shuffled = random.sample(students, len(students))
-    
-    # Mechatronics groups (2 groups)
-    mech_groups = {"Group A": [], "Group B": []}
-    for i, student in enumerate(shuffled):
-        group = "Group A" if i % 2 == 0 else "Group B"
-        mech_groups[group].append({
-            **student,
-            'marks': ''
-        })
-    
-    # Renewable groups (3 groups)
-    renew_groups = {"Group A": [], "Group B": [], "Group C": []}
-    for i, student in enumerate(shuffled):
-        if i % 3 == 0:
-            group = "Group A"
-        elif i % 3 == 1:
-            group = "Group B"
-        else:
-            group = "Group C"
-        renew_groups[group].append({
-            **student,
-            'marks': ''
-        })
+    shuffled = students[:]
+    random.shuffle(shuffled)
     
     # Save groups
-    save_data(MECHTRONICS_GROUPS_FILE, mech_groups)
-    save_data(RENEWABLE_GROUPS_FILE, renew_groups)
+    save_groups(group_records(shuffled, MECH_GROUPS), group_records(shuffled, RENEW_GROUPS))
     
     return True
 
+def append_to_groups(student):
+    """Add a student to the smallest group of each lab"""
+    mech, renew = get_groups()
+    
+    # Nothing to extend until the first full assignment has run
+    if not mech or not renew:
+        return False
+    
+    for records, groups in ((mech, MECH_GROUPS), (renew, RENEW_GROUPS)):
+        sizes = group_sizes(records, groups)
+        smallest = min(sizes, key=sizes.get)
+        records.append({'index': student['index'], 'name': student['name'], 'group': smallest})
+    save_groups(mech, renew)
+    
+    return True
+
+def remove_from_groups(index):
+    """Drop a student's records from both labs' groups"""
+    mech, renew = get_groups()
+    save_groups(
+        [r for r in mech if r['index'] != index],
+        [r for r in renew if r['index'] != index]
+    )
+
 # ==================== EXCEL GENERATION ====================
 def to_excel(df):
     """Convert to Excel"""
+    import pandas as pd
+    from io import BytesIO
+    
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    # No constant_memory: pandas writes column by column, and that mode
+    # flushes each row once a later row is touched, dropping earlier cells
+    options = {'strings_to_formulas': False, 'strings_to_urls': False}
+    with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': options}) as writer:
         df.to_excel(writer, index=False)
     return output.getvalue()
 
@@ -177,8 +379,9 @@ def check_password():
         submitted = st.form_submit_button("Login")
         
         if submitted:
+            digest = hashlib.sha256(st.session_state.password.encode()).digest()
             if st.session_state.username == ADMIN_USERNAME and \
-               hashlib.sha256(st.session_state.password.encode()).hexdigest() == ADMIN_PASSWORD_HASH:
+               hmac.compare_digest(digest, ADMIN_PASSWORD_HASH_BYTES):
                 st.session_state.authenticated = True
                 st.rerun()
             else:
@@ -212,16 +415,16 @@ def student_interface():
                 st.error("Index number already registered")
             else:
                 # Save student
-                students = load_data(STUDENTS_FILE) or []
-                students.append({
+                student = {
                     'name': name.strip(),
                     'index': index.upper(),
                     'date': datetime.now().strftime("%Y-%m-%d")
-                })
-                save_data(STUDENTS_FILE, students)
+                }
+                append_student(student)
+                students = load_students()
                 
-                # Update groups
-                if len(students) >= 6:
+                # Update groups (full shuffle only the first time)
+                if len(students) >= 6 and not append_to_groups(student):
                     assign_groups(students)
                 
                 st.success("Registration successful!")
@@ -229,7 +432,7 @@ def student_interface():
                 st.rerun()
     
     # Show stats
-    students = load_data(STUDENTS_FILE) or []
+    students = load_students()
     if students:
         st.divider()
         col1, col2, col3 = st.columns(3)
@@ -258,18 +461,27 @@ def admin_interface():
     elif menu == "Backup":
         backup_interface()
 
+# Keyed on the (group, count) pairs, so the figure is only rebuilt when sizes change
+@st.cache_data(show_spinner=False, max_entries=8)
+def group_chart(counts):
+    """Bar chart of group sizes"""
+    import pandas as pd
+    import plotly.express as px
+    
+    df = pd.DataFrame({'Group': [g for g, _ in counts], 'Count': [c for _, c in counts]})
+    return px.bar(df, x='Group', y='Count', title='Group Distribution')
+
 def show_dashboard():
     """Show dashboard"""
-    students = load_data(STUDENTS_FILE) or []
-    mech = load_data(MECHTRONICS_GROUPS_FILE) or {}
-    renew = load_data(RENEWABLE_GROUPS_FILE) or {}
+    students = load_students()
+    mech, renew = get_groups()
     app_state = load_data(APP_STATE_FILE) or {}
     
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Students", len(students))
-    col2.metric("Mechatronics", sum(len(g) for g in mech.values()))
-    col3.metric("Renewable", sum(len(g) for g in renew.values()))
+    col2.metric("Mechatronics", len(mech))
+    col3.metric("Renewable", len(renew))
     col4.metric("Last Backup", app_state.get('last_backup', 'Never')[:10] if app_state.get('last_backup') else 'Never')
     
     # Charts
@@ -279,40 +491,52 @@ def show_dashboard():
         with col1:
             st.subheader("Mechatronics Groups")
             if mech:
-                data = {'Group': list(mech.keys()), 'Count': [len(v) for v in mech.values()]}
-                df = pd.DataFrame(data)
-                fig = px.bar(df, x='Group', y='Count', title='Group Distribution')
-                st.plotly_chart(fig, use_container_width=True)
+                sizes = group_sizes(mech, MECH_GROUPS)
+                st.plotly_chart(group_chart(tuple(sizes.items())), use_container_width=True)
         
         with col2:
             st.subheader("Renewable Groups")
             if renew:
-                data = {'Group': list(renew.keys()), 'Count': [len(v) for v in renew.values()]}
-                df = pd.DataFrame(data)
-                fig = px.bar(df, x='Group', y='Count', title='Group Distribution')
-                st.plotly_chart(fig, use_container_width=True)
+                sizes = group_sizes(renew, RENEW_GROUPS)
+                st.plotly_chart(group_chart(tuple(sizes.items())), use_container_width=True)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _search_arrays(stamp):
+    """Upper-cased name and index arrays for search, built once per file change"""
+    import numpy as np
+    students = load_students()
+    names = np.char.upper(np.array([s['name'] for s in students], dtype=str))
+    indices = np.array([s['index'] for s in students], dtype=str)
+    return names, indices
 
 def manage_students():
     """Manage students"""
+    import pandas as pd
+    import numpy as np
+    
     st.header("Student Management")
     
-    students = load_data(STUDENTS_FILE) or []
+    students = load_students()
     
     if not students:
         st.info("No students registered")
         return
     
-    # Search
-    search = st.text_input("🔍 Search", placeholder="Name or Index")
+    # Search (inside a form, so typing doesn't rerun the page)
+    with st.form("search_form", clear_on_submit=False, border=False):
+        search = st.text_input("🔍 Search", placeholder="Name or Index")
+        st.form_submit_button("Search")
     
     df = pd.DataFrame(students)
     
     if search:
-        mask = df['name'].str.contains(search, case=False) | df['index'].str.contains(search, case=False)
+        names, indices = _search_arrays(file_stamp(STUDENTS_FILE))
+        q = search.upper()
+        mask = (np.char.find(names, q) >= 0) | (np.char.find(indices, q) >= 0)
         df = df[mask]
     
     # Pagination
-    total_pages = (len(df) + PAGE_SIZE - 1) // PAGE_SIZE
+    total_pages = max(1, (len(df) + PAGE_SIZE - 1) // PAGE_SIZE)
     page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
     
     start = (page - 1) * PAGE_SIZE
@@ -322,131 +546,122 @@ def manage_students():
     
     # Delete option
     with st.expander("Delete Student"):
-        index_to_delete = st.selectbox("Select student", [f"{row['index']} - {row['name']}" for _, row in df.iterrows()])
-        if st.button("Delete", type="secondary"):
-            idx = [f"{s['index']} - {s['name']}" for s in students].index(index_to_delete)
-            students.pop(idx)
-            save_data(STUDENTS_FILE, students)
-            assign_groups(students)  # Reassign groups
+        # One label per student and a label -> position map; the options
+        # follow the search filter through the frame's row positions
+        labels = [f"{s['index']} - {s['name']}" for s in students]
+        label_to_idx = {label: i for i, label in enumerate(labels)}
+        index_to_delete = st.selectbox("Select student", [labels[i] for i in df.index])
+        if st.button("Delete", type="secondary") and index_to_delete:
+            removed = students.pop(label_to_idx[index_to_delete])
+            save_students(students)
+            # Reassign groups; below 6 students just drop the removed one
+            if not assign_groups(students):
+                remove_from_groups(removed['index'])
             st.success("Student deleted")
             st.rerun()
 
+def show_lab_groups(records, groups, cols):
+    """One expander per group, members listed from a single groupby"""
+    import pandas as pd
+    
+    df = pd.DataFrame(records, columns=['index', 'name', 'group'])
+    by_group = dict(tuple(df.groupby('group', sort=False)))
+    
+    for col, group in zip(cols, groups):
+        members = by_group.get(group)
+        count = 0 if members is None else len(members)
+        with col:
+            with st.expander(f"{group} ({count} students)"):
+                if count:
+                    st.dataframe(members[['index', 'name']], use_container_width=True, hide_index=True)
+
 def view_groups():
     """View groups"""
     st.header("Group Management")
     
-    mech = load_data(MECHTRONICS_GROUPS_FILE) or {}
-    renew = load_data(RENEWABLE_GROUPS_FILE) or {}
+    mech, renew = get_groups()
     
     tab1, tab2 = st.tabs(["Mechatronics", "Renewable Energy"])
     
     with tab1:
         st.subheader("Mechatronics Lab Groups")
-        col1, col2 = st.columns(2)
-        
-        for i, (group, members) in enumerate(mech.items()):
-            with col1 if i == 0 else col2:
-                with st.expander(f"{group} ({len(members)} students)"):
-                    if members:
-                        df = pd.DataFrame(members)
-                        st.dataframe(df[['index', 'name']], use_container_width=True, hide_index=True)
+        show_lab_groups(mech, MECH_GROUPS, st.columns(2))
     
     with tab2:
         st.subheader("Renewable Energy Groups")
-        cols = st.columns(3)
-        
-        for i, (group, members) in enumerate(renew.items()):
-            with cols[i]:
-                with st.expander(f"{group} ({len(members)} students)"):
-                    if members:
-                        df = pd.DataFrame(members)
-                        st.dataframe(df[['index', 'name']], use_container_width=True, hide_index=True)
+        show_lab_groups(renew, RENEW_GROUPS, st.columns(3))
     
     # Reassign button
     if st.button("🔄 Reassign Groups", type="primary"):
-        students = load_data(STUDENTS_FILE) or []
+        students = load_students()
         if assign_groups(students):
             st.success("Groups reassigned successfully")
             st.rerun()
         else:
             st.warning("Need at least 6 students")
 
+def report_frame(records):
+    """Index/Name/Group/Marks frame of a lab's group records, ordered by group"""
+    import pandas as pd
+    
+    df = pd.DataFrame(records, columns=['index', 'name', 'group'])
+    df = df.sort_values('group', kind='stable', ignore_index=True)
+    df = df.rename(columns={'index': 'Index', 'name': 'Name', 'group': 'Group'})
+    df['Marks'] = ''
+    return df
+
 def generate_reports():
     """Generate reports"""
+    import pandas as pd
+    
     st.header("Generate Reports")
     
-    mech = load_data(MECHTRONICS_GROUPS_FILE) or {}
-    renew = load_data(RENEWABLE_GROUPS_FILE) or {}
+    mech, renew = get_groups()
     
     report_type = st.radio("Report Type", ["Mechatronics", "Renewable", "Combined"], horizontal=True)
     
     if report_type == "Mechatronics":
         if mech:
-            data = []
-            for group, members in mech.items():
-                for m in members:
-                    data.append({
-                        'Index': m['index'],
-                        'Name': m['name'],
-                        'Group': group,
-                        'Marks': ''
-                    })
-            df = pd.DataFrame(data)
+            df = report_frame(mech)
             st.data_editor(df, use_container_width=True, hide_index=True)
             
             # Download
-            excel_data = to_excel(df)
-            b64 = base64.b64encode(excel_data).decode()
-            st.markdown(f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="mechatronics_groups.xlsx">📥 Download Excel</a>', unsafe_allow_html=True)
+            st.download_button(
+                "📥 Download Excel",
+                data=to_excel(df),
+                file_name="mechatronics_groups.xlsx",
+                mime=XLSX_MIME
+            )
     
     elif report_type == "Renewable":
         if renew:
-            data = []
-            for group, members in renew.items():
-                for m in members:
-                    data.append({
-                        'Index': m['index'],
-                        'Name': m['name'],
-                        'Group': group,
-                        'Marks': ''
-                    })
-            df = pd.DataFrame(data)
+            df = report_frame(renew)
             st.data_editor(df, use_container_width=True, hide_index=True)
             
             # Download
-            excel_data = to_excel(df)
-            b64 = base64.b64encode(excel_data).decode()
-            st.markdown(f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="renewable_groups.xlsx">📥 Download Excel</a>', unsafe_allow_html=True)
+            st.download_button(
+                "📥 Download Excel",
+                data=to_excel(df),
+                file_name="renewable_groups.xlsx",
+                mime=XLSX_MIME
+            )
     
     else:  # Combined
-        data = []
-        for group, members in mech.items():
-            for m in members:
-                data.append({
-                    'Index': m['index'],
-                    'Name': m['name'],
-                    'Lab': 'Mechatronics',
-                    'Group': group,
-                    'Marks': ''
-                })
-        for group, members in renew.items():
-            for m in members:
-                data.append({
-                    'Index': m['index'],
-                    'Name': m['name'],
-                    'Lab': 'Renewable',
-                    'Group': group,
-                    'Marks': ''
-                })
-        
-        if data:
-            df = pd.DataFrame(data)
+        if mech or renew:
+            mech_df = report_frame(mech)
+            mech_df.insert(2, 'Lab', 'Mechatronics')
+            renew_df = report_frame(renew)
+            renew_df.insert(2, 'Lab', 'Renewable')
+            df = pd.concat([mech_df, renew_df], ignore_index=True)
             st.dataframe(df, use_container_width=True, hide_index=True)
             
             # Download
-            excel_data = to_excel(df)
-            b64 = base64.b64encode(excel_data).decode()
-            st.markdown(f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="all_groups.xlsx">📥 Download Excel</a>', unsafe_allow_html=True)
+            st.download_button(
+                "📥 Download Excel",
+                data=to_excel(df),
+                file_name="all_groups.xlsx",
+                mime=XLSX_MIME
+            )
 
 def backup_interface():
     """Backup interface"""
@@ -465,9 +680,14 @@ def backup_interface():
         backups = list_backups()
         
         if backups:
-            selected = st.selectbox("Select backup", [b['name'] for b in backups])
+            by_name = {b['name']: b for b in backups}
+            selected = st.selectbox("Select backup", list(by_name))
             if st.button("Restore"):
-                st.warning("Restore functionality would go here")
+                try:
+                    count = restore_backup(by_name[selected])
+                    st.success(f"Restored {count} files from {selected}")
+                except (OSError, ValueError, zipfile.BadZipFile) as e:
+                    st.error(f"Restore failed: {e}")
         else:
             st.info("No backups available")
 
@@ -475,7 +695,12 @@ def backup_interface():
 def main():
     # Initialize
     init_directories()
-    init_data_files()
+    try:
+        init_data_files()
+    except ValueError as e:
+        # Leave an unreadable legacy students.json in place for manual repair
+        st.error(f"Could not convert {LEGACY_STUDENTS_FILE}: {e}")
+        st.stop()
     
     # Sidebar
     with st.sidebar: